@@ -1,91 +1,117 @@
-import traceback
+import asyncio
+import atexit
+import queue
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from fastapi import FastAPI, Request, HTTPException, Depends
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Request, HTTPException, Body
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from passlib.context import CryptContext
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from typing import List, Optional
+from init_db import init_db
+from passwords import get_password_hash, verify_password
 import duckdb
+import hashlib
 import logging
+import logging.handlers
+import orjson
+import pyarrow as pa
 import secrets
-
-logging.basicConfig(level=logging.INFO)
+import time
+
+# Records are handed to a queue and written to stderr by a listener thread,
+# so logging an error (traceback included) never waits on stderr I/O
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(log_queue)])
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Verified against when a login names an unknown user, so failed logins take
+# the same time whether or not the username exists
+DUMMY_HASH = get_password_hash("dummy")
 
 import os
 
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, which encodes datetimes natively."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+class DuckDBPool:
+    """Fixed-size pool of DuckDB connections to a single database file.
+
+    DuckDB refuses to open the same file twice in one process with different
+    settings, so the pooled connections are cursors of one parent connection.
+    Each cursor is an independent connection to the shared database instance
+    and can run queries concurrently with the others.
+
+    Waiting for a free connection happens on the event loop (asyncio.Queue),
+    never in an executor thread: those threads are needed by the holders to
+    run their queries, and parking waiters on them would starve the pool.
+    """
+
+    def __init__(self, db_path: str, max_connections: int = 4):
+        # threads and memory_limit are database-wide, so they're set once on
+        # the parent connection. The memory limit defaults well below the
+        # container's 512Mi so DuckDB spills to disk before it gets OOM-killed.
+        self.conn = duckdb.connect(db_path, config={
+            'allow_unsigned_extensions': True,
+            'threads': max_connections,
+            'memory_limit': os.getenv('DB_MEMORY_LIMIT', '256MB'),
+        })
+        self._pool = asyncio.Queue(maxsize=max_connections)
+        for _ in range(max_connections):
+            self._pool.put_nowait(self.conn.cursor())
+
+    @asynccontextmanager
+    async def acquire(self):
+        conn = await self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put_nowait(conn)
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+        self.conn.close()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     # Use environment variable for database path, default to local file
     db_path = os.getenv('DB_PATH', 'sample.db')
-    conn = duckdb.connect(db_path, config={'allow_unsigned_extensions': True})
-
-    # Create employees table
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS employees (
-            id INTEGER PRIMARY KEY,
-            name VARCHAR,
-            age INTEGER,
-            email VARCHAR,
-            department VARCHAR
-        )
-    """)
-    if conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0] == 0:
-        sample = [
-            (1, "Paul Smith",     32, "paul@example.com",     "Engineering"),
-            (2, "Lisa Wong",      28, "lisa@example.com",      "Design"),
-            (3, "Tom Chen",       45, "tom@example.com",       "Management"),
-            (4, "Anna Lee",       29, "anna@example.com",      "Marketing"),
-            (5, "David Kim",      38, "david@example.com",     "Sales")
-        ]
-        conn.executemany("INSERT INTO employees VALUES (?,?,?,?,?)", sample)
-        conn.commit()
-        print("Sample data inserted")
-
-    # Create sequence for user IDs
-    conn.execute("CREATE SEQUENCE IF NOT EXISTS user_id_seq START 1;")
-
-    # Create users table using the sequence for the default value
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY DEFAULT nextval('user_id_seq'),
-            username VARCHAR UNIQUE NOT NULL,
-            email VARCHAR UNIQUE NOT NULL,
-            hashed_password VARCHAR NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    # Check if admin user exists, if not create one
-    if conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
-        # Create default admin user
-        admin_username = "admin"
-        admin_email = "admin@example.com"
-        admin_password = "admin123"  # Change this in production
-
-        hashed_password = pwd_context.hash(admin_password)
-        conn.execute(
-            "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
-            [admin_username, admin_email, hashed_password]
-        )
-        conn.commit()
-        print(f"Default admin user created: {admin_username}")
+    pool = DuckDBPool(db_path, max_connections=int(os.getenv('DB_POOL_SIZE', '4')))
+
+    # Schema setup lives in init_db.py. Deployments that run it once as a
+    # pre-start step set SKIP_DB_INIT=1 so each worker only opens the database.
+    if not os.getenv('SKIP_DB_INIT'):
+        init_db(pool.conn)
+
+    # Handlers borrow connections with app.state.pool.acquire()
+    app.state.pool = pool
 
-    # Store connection in global variable or use dependency injection
-    app.state.conn = conn
+    # Drop expired sessions in the background so they don't pile up
+    sweeper = asyncio.create_task(sweep_expired_sessions(pool))
 
     yield  # This is where the application runs
 
     # Shutdown cleanup
-    conn.close()
+    sweeper.cancel()
+    pool.close()
 
-app = FastAPI(title="Handsontable with DuckDB", lifespan=lifespan)
+app = FastAPI(
+    title="Handsontable with DuckDB",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -98,271 +124,344 @@ app.add_middleware(
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Initialize templates
-templates = Jinja2Templates(directory="templates")
+# index.html has no template expressions, so it is sent as a plain file
+# rather than rendered through Jinja on every request
+INDEX_HTML = os.path.join("templates", "index.html")
+
+# Request bodies. FastAPI validates these before the handler runs, and
+# handlers only acquire a pooled connection inside their body, so bad input
+# is rejected with a 422 without holding a connection or touching the database.
+class EmployeeIn(BaseModel):
+    """Employee fields as sent by the grid; missing or null text becomes ''."""
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    name: str = ''
+    age: Optional[int] = None
+    email: str = ''
+    department: str = ''
+
+    @field_validator('name', 'email', 'department', mode='before')
+    @classmethod
+    def none_as_empty(cls, value):
+        return '' if value is None else value
+
+
+class NewEmployeeIn(EmployeeIn):
+    @model_validator(mode='after')
+    def not_empty(self):
+        if not self.name and not self.email and self.age is None and not self.department:
+            raise ValueError("Cannot add completely empty record")
+        return self
+
+
+class UserRegisterIn(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    username: str = Field(min_length=1)
+    email: str = Field(min_length=1)
+    password: str = Field(min_length=1)
+
+
+class UserLoginIn(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    username: str = Field(min_length=1)
+    password: str = Field(min_length=1)
+
+
+class LogoutIn(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    session_token: str = Field(min_length=1)
+
 
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+async def home():
+    return FileResponse(INDEX_HTML, media_type="text/html")
 
 @app.get("/data")
 async def get_data(request: Request):
     try:
-        conn = request.app.state.conn
-        result = conn.execute("SELECT * FROM employees ORDER BY id").fetchall()
-        columns = [desc[0] for desc in conn.description]
-
-        data = []
-        for row in result:
-            record = {}
-            for i, col in enumerate(columns):
-                value = row[i]
-                if hasattr(value, 'item'):
-                    record[col] = value.item()
-                else:
-                    record[col] = value
-            data.append(record)
-
-        return data
+        async with request.app.state.pool.acquire() as conn:
+            # Arrow builds the row dicts in C, no per-cell Python work needed.
+            # Not a PREPAREd statement on purpose: DuckDB plans with the column
+            # statistics of the moment, and re-running an old plan after inserts
+            # or updates returned corrupted values for the changed rows.
+            table = await asyncio.to_thread(
+                lambda: conn.execute("SELECT * FROM employees ORDER BY id").fetch_arrow_table()
+            )
+            # Returning the response directly skips FastAPI's jsonable_encoder pass
+            return ORJSONResponse(table.to_pylist())
     except Exception as e:
-        logger.error(f"Error in /data endpoint: {e}")
-        traceback.print_exc()
+        logger.exception("Error in /data endpoint")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/data")
-async def add_data(request: Request):
+async def add_data(request: Request, item: NewEmployeeIn):
     try:
-        item = await request.json()
-        conn = request.app.state.conn
-        name = item.get('name', '').strip()
-        age = item.get('age')
-        email = item.get('email', '').strip()
-        department = item.get('department', '').strip()
-
-        if not name and not email and age is None and not department:
-            raise HTTPException(status_code=400, detail="Cannot add completely empty record")
-
-        # Always generate new ID
-        next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM employees").fetchone()[0]
-
-        conn.execute(
-            "INSERT INTO employees (id, name, age, email, department) VALUES (?, ?, ?, ?, ?)",
-            [next_id, name, age, email, department]
-        )
+        async with request.app.state.pool.acquire() as conn:
+            # The ID comes from employee_id_seq
+            new_id = await asyncio.to_thread(
+                lambda: conn.execute(
+                    "INSERT INTO employees (name, age, email, department) VALUES (?, ?, ?, ?) RETURNING id",
+                    [item.name, item.age, item.email, item.department]
+                ).fetchone()[0]
+            )
+            await asyncio.to_thread(conn.commit)
+
+            return {"message": "Record added", "id": new_id}
+    except Exception as e:
+        logger.exception("Error in /data POST endpoint")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Column types for rows ingested by /data/bulk
+EMPLOYEE_INPUT_SCHEMA = pa.schema([
+    ("name", pa.string()),
+    ("age", pa.int32()),
+    ("email", pa.string()),
+    ("department", pa.string()),
+])
+
+
+def insert_employees(conn, rows: list) -> list:
+    # DuckDB scans the registered Arrow table directly, so the whole batch
+    # goes in with one INSERT ... SELECT instead of a statement per row
+    conn.register("new_employees", pa.Table.from_pylist(rows, schema=EMPLOYEE_INPUT_SCHEMA))
+    try:
+        result = conn.execute("""
+            INSERT INTO employees (name, age, email, department)
+            SELECT name, age, email, department FROM new_employees
+            RETURNING id
+        """).fetchall()
         conn.commit()
+    finally:
+        conn.unregister("new_employees")
+    return [row[0] for row in result]
+
 
-        return {"message": "Record added", "id": next_id}
+@app.post("/data/bulk")
+async def bulk_add_data(request: Request, items: List[NewEmployeeIn] = Body(min_length=1)):
+    try:
+        async with request.app.state.pool.acquire() as conn:
+            rows = [item.model_dump() for item in items]
+            new_ids = await asyncio.to_thread(insert_employees, conn, rows)
+
+            return {"message": "Records added", "ids": new_ids}
     except Exception as e:
-        logger.error(f"Error in /data POST endpoint: {e}")
-        traceback.print_exc()
+        logger.exception("Error in /data/bulk endpoint")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/data/{id}")
-async def update(id: int, request: Request):
+async def update(id: int, request: Request, item: EmployeeIn):
     try:
-        item = await request.json()
-        conn = request.app.state.conn
+        async with request.app.state.pool.acquire() as conn:
+            values = [item.name, item.age, item.email, item.department, id]
 
-        values = [
-            item.get('name', '').strip(),
-            item.get('age'),
-            item.get('email', '').strip(),
-            item.get('department', '').strip(),
-            id
-        ]
+            result = await asyncio.to_thread(conn.execute, """
+                UPDATE employees
+                SET name = ?, age = ?, email = ?, department = ?
+                WHERE id = ?
+            """, values)
 
-        result = conn.execute("""
-            UPDATE employees
-            SET name = ?, age = ?, email = ?, department = ?
-            WHERE id = ?
-        """, values)
+            await asyncio.to_thread(conn.commit)
 
-        conn.commit()
-
-        if result.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Record not found")
+            if result.rowcount == 0:
+                raise HTTPException(status_code=404, detail="Record not found")
 
-        return {"message": "Updated successfully"}
+            return {"message": "Updated successfully"}
     except Exception as e:
-        logger.error(f"Error in /data PUT endpoint: {e}")
-        traceback.print_exc()
+        logger.exception("Error in /data PUT endpoint")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/data/{id}")
 async def delete(id: int, request: Request):
     try:
-        conn = request.app.state.conn
-        result = conn.execute("DELETE FROM employees WHERE id = ?", [id])
-        conn.commit()
+        async with request.app.state.pool.acquire() as conn:
+            result = await asyncio.to_thread(conn.execute, "DELETE FROM employees WHERE id = ?", [id])
+            await asyncio.to_thread(conn.commit)
 
-        if result.rowcount == 0:
-            raise HTTPException(status_code=404, detail="Record not found")
+            if result.rowcount == 0:
+                raise HTTPException(status_code=404, detail="Record not found")
 
-        return {"message": "Deleted successfully"}
+            return {"message": "Deleted successfully"}
     except Exception as e:
-        logger.error(f"Error in /data DELETE endpoint: {e}")
-        traceback.print_exc()
+        logger.exception("Error in /data DELETE endpoint")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# Authentication helper functions
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# Authentication helper functions (password hashing lives in passwords.py)
 
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+# Column lists of the user queries below, fixed by their SELECT lists, so
+# rows can be zipped into dicts without reading conn.description per request
+USER_COLUMNS = ("id", "username", "email", "hashed_password", "created_at")
+USER_INFO_COLUMNS = ("id", "username", "email", "created_at")
 
 
 def get_user_by_username(conn, username: str):
-    result = conn.execute("SELECT * FROM users WHERE username = ?", [username]).fetchone()
+    result = conn.execute(
+        "SELECT id, username, email, hashed_password, created_at FROM users WHERE username = ?",
+        [username]
+    ).fetchone()
     if result:
-        return {
-            "id": result[0],
-            "username": result[1],
-            "email": result[2],
-            "hashed_password": result[3],
-            "created_at": result[4]
-        }
+        return dict(zip(USER_COLUMNS, result))
     return None
 
 
-def authenticate_user(conn, username: str, password: str):
-    user = get_user_by_username(conn, username)
-    if not user or not verify_password(password, user["hashed_password"]):
+async def authenticate_user(conn, username: str, password: str):
+    user = await asyncio.to_thread(get_user_by_username, conn, username)
+    # Hashing is CPU-bound, keep it off the event loop
+    hashed_password = user["hashed_password"] if user else DUMMY_HASH
+    valid, new_hash = await asyncio.to_thread(verify_password, password, hashed_password)
+    if not valid or not user:
         return False
+    if new_hash:
+        # Stored hash uses a deprecated scheme or old settings, replace it
+        await asyncio.to_thread(
+            conn.execute, "UPDATE users SET hashed_password = ? WHERE id = ?", [new_hash, user["id"]]
+        )
+        await asyncio.to_thread(conn.commit)
     return user
 
 
-# Session management (for simplicity, using in-memory storage)
-active_sessions = {}
+# Session management, persisted in the sessions table so sessions survive
+# restarts and are shared by all of this process's pooled connections. Rows are
+# keyed by the SHA-256 digest of the token rather than the token itself, so
+# a leaked table doesn't leak usable tokens and lookups never compare
+# attacker-supplied bytes against a secret.
+SESSION_SWEEP_INTERVAL = 60  # seconds
 
 
-def create_session(user_id: int) -> str:
-    session_token = secrets.token_urlsafe(32)
-    active_sessions[session_token] = {
-        "user_id": user_id,
-        "created_at": datetime.now(),
-        "expires_at": datetime.now() + timedelta(hours=24)  # 24 hour session
-    }
-    return session_token
+def hash_session_token(session_token: str) -> bytes:
+    return hashlib.sha256(session_token.encode()).digest()
 
 
-def get_current_user_from_session(session_token: str):
-    if session_token in active_sessions:
-        session_data = active_sessions[session_token]
-        if session_data["expires_at"] > datetime.now():
-            return session_data["user_id"]
-        else:
-            # Session expired, remove it
-            del active_sessions[session_token]
-    return None
+def create_session(conn, user_id: int) -> str:
+    session_token = secrets.token_urlsafe(32)
+    now = datetime.now()
+    conn.execute(
+        "INSERT INTO sessions (token_hash, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)",
+        [hash_session_token(session_token), user_id, now, now + timedelta(hours=24)]  # 24 hour session
+    )
+    conn.commit()
+    return session_token
 
 
-def logout_session(session_token: str):
-    if session_token in active_sessions:
-        del active_sessions[session_token]
+def get_current_user_from_session(conn, session_token: str):
+    # Expired rows are left for the sweeper to delete
+    result = conn.execute(
+        "SELECT user_id FROM sessions WHERE token_hash = ? AND expires_at > ?",
+        [hash_session_token(session_token), datetime.now()]
+    ).fetchone()
+    return result[0] if result else None
 
 
-# User registration endpoint
-@app.post("/register")
-async def register_user(request: Request):
-    try:
-        data = await request.json()
-        username = data.get('username', '').strip()
-        email = data.get('email', '').strip()
-        password = data.get('password', '').strip()
+def logout_session(conn, session_token: str):
+    conn.execute("DELETE FROM sessions WHERE token_hash = ?", [hash_session_token(session_token)])
+    conn.commit()
 
-        if not username or not email or not password:
-            raise HTTPException(status_code=400, detail="Username, email, and password are required")
 
-        conn = request.app.state.conn
+def purge_expired_sessions(conn):
+    conn.execute("DELETE FROM sessions WHERE expires_at <= ?", [datetime.now()])
+    conn.commit()
 
-        # Check if user already exists
-        existing_user = get_user_by_username(conn, username)
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Username already registered")
 
-        # Check if email already exists
-        existing_email = conn.execute("SELECT * FROM users WHERE email = ?", [email]).fetchone()
-        if existing_email:
-            raise HTTPException(status_code=400, detail="Email already registered")
+async def sweep_expired_sessions(pool: DuckDBPool):
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        async with pool.acquire() as conn:
+            try:
+                await asyncio.to_thread(purge_expired_sessions, conn)
+            except Exception:
+                logger.exception("Error sweeping expired sessions")
 
-        # Hash the password
-        hashed_password = get_password_hash(password)
 
-        # Insert new user
-        conn.execute(
-            "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
-            [username, email, hashed_password]
-        )
-        conn.commit()
+# Cache of user_id -> (user info, time cached) for /user/me, so clients that
+# poll it don't hit the database every time. Entries expire after
+# USER_CACHE_TTL seconds; pop a user's entry whenever their row is changed.
+USER_CACHE_TTL = 60
+user_cache = {}
 
-        # Get the auto-generated ID
-        new_user_id = conn.execute("SELECT id FROM users WHERE username = ?", [username]).fetchone()[0]
 
-        return {"message": "User registered successfully", "user_id": new_user_id}
+# User registration endpoint
+@app.post("/register")
+async def register_user(request: Request, data: UserRegisterIn):
+    try:
+        async with request.app.state.pool.acquire() as conn:
+            username, email, password = data.username, data.email, data.password
+
+            # Check if username or email already exists in a single probe
+            username_taken, email_taken = await asyncio.to_thread(
+                lambda: conn.execute(
+                    """
+                    SELECT EXISTS (SELECT 1 FROM users WHERE username = ?),
+                           EXISTS (SELECT 1 FROM users WHERE email = ?)
+                    """,
+                    [username, email]
+                ).fetchone()
+            )
+            if username_taken:
+                raise HTTPException(status_code=400, detail="Username already registered")
+            if email_taken:
+                raise HTTPException(status_code=400, detail="Email already registered")
+
+            # Hash the password (CPU-bound, so in a worker thread)
+            hashed_password = await asyncio.to_thread(get_password_hash, password)
+
+            # Insert new user, getting the auto-generated ID back in the same statement
+            new_user_id = await asyncio.to_thread(
+                lambda: conn.execute(
+                    "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?) RETURNING id",
+                    [username, email, hashed_password]
+                ).fetchone()[0]
+            )
+            await asyncio.to_thread(conn.commit)
+
+            return {"message": "User registered successfully", "user_id": new_user_id}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in /register endpoint: {e}")
-        traceback.print_exc()
+        logger.exception("Error in /register endpoint")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # User login endpoint
 @app.post("/login")
-async def login_user(request: Request):
+async def login_user(request: Request, data: UserLoginIn):
     try:
-        data = await request.json()
-        username = data.get('username', '').strip()
-        password = data.get('password', '').strip()
-
-        if not username or not password:
-            raise HTTPException(status_code=400, detail="Username and password are required")
-
-        conn = request.app.state.conn
-
-        user = authenticate_user(conn, username, password)
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-
-        # Create session
-        session_token = create_session(user["id"])
-
-        return {
-            "message": "Login successful",
-            "session_token": session_token,
-            "user": {
-                "id": user["id"],
-                "username": user["username"],
-                "email": user["email"]
+        async with request.app.state.pool.acquire() as conn:
+            user = await authenticate_user(conn, data.username, data.password)
+            if not user:
+                raise HTTPException(status_code=401, detail="Invalid credentials")
+
+            # Create session
+            session_token = await asyncio.to_thread(create_session, conn, user["id"])
+
+            return {
+                "message": "Login successful",
+                "session_token": session_token,
+                "user": {
+                    "id": user["id"],
+                    "username": user["username"],
+                    "email": user["email"]
+                }
             }
-        }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in /login endpoint: {e}")
-        traceback.print_exc()
+        logger.exception("Error in /login endpoint")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # User logout endpoint
 @app.post("/logout")
-async def logout_user(request: Request):
+async def logout_user(request: Request, data: LogoutIn):
     try:
-        data = await request.json()
-        session_token = data.get('session_token', '').strip()
+        async with request.app.state.pool.acquire() as conn:
+            await asyncio.to_thread(logout_session, conn, data.session_token)
 
-        if not session_token:
-            raise HTTPException(status_code=400, detail="Session token is required")
-
-        logout_session(session_token)
-
-        return {"message": "Logout successful"}
+            return {"message": "Logout successful"}
     except Exception as e:
-        logger.error(f"Error in /logout endpoint: {e}")
-        traceback.print_exc()
+        logger.exception("Error in /logout endpoint")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -375,27 +474,29 @@ async def get_current_user(request: Request):
         if not session_token:
             raise HTTPException(status_code=401, detail="Session token is required")
 
-        user_id = get_current_user_from_session(session_token)
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid or expired session")
+        async with request.app.state.pool.acquire() as conn:
+            user_id = await asyncio.to_thread(get_current_user_from_session, conn, session_token)
+            if not user_id:
+                raise HTTPException(status_code=401, detail="Invalid or expired session")
+
+            cached = user_cache.get(user_id)
+            if cached and time.monotonic() - cached[1] < USER_CACHE_TTL:
+                return cached[0]
 
-        conn = request.app.state.conn
-        user = conn.execute("SELECT id, username, email, created_at FROM users WHERE id = ?", [user_id]).fetchone()
+            user = await asyncio.to_thread(
+                lambda: conn.execute("SELECT id, username, email, created_at FROM users WHERE id = ?", [user_id]).fetchone()
+            )
 
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
 
-        return {
-            "id": user[0],
-            "username": user[1],
-            "email": user[2],
-            "created_at": user[3]
-        }
+            user_info = dict(zip(USER_INFO_COLUMNS, user))
+            user_cache[user_id] = (user_info, time.monotonic())
+            return user_info
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in /user/me endpoint: {e}")
-        traceback.print_exc()
+        logger.exception("Error in /user/me endpoint")
         raise HTTPException(status_code=500, detail=str(e))
 
 # For Render deployment, we don't include the if __name__ == "__main__" block
@@ -1,45 +1,97 @@
+import os
 import duckdb
-conn = duckdb.connect('sample.db', config={'allow_unsigned_extensions': True})
-
-# Create users table
-conn.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY,
-        username VARCHAR UNIQUE NOT NULL,
-        email VARCHAR UNIQUE NOT NULL,
-        hashed_password VARCHAR NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-""")
-
-# Check if admin user exists, if not create one
-if conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
-    # Create default admin user
-    from passlib.context import CryptContext
-    # Use a different scheme that doesn't rely on bcrypt if there are issues
-    pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
-
-    admin_username = "admin"
-    admin_email = "admin@example.com"
-    admin_password = "admin123"  # Change this in production
-
-    hashed_password = pwd_context.hash(admin_password)
-    # Get the next ID
-    next_id_result = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM users").fetchone()
-    next_id = next_id_result[0]
-    conn.execute(
-        "INSERT INTO users (id, username, email, hashed_password) VALUES (?, ?, ?, ?)",
-        [next_id, admin_username, admin_email, hashed_password]
-    )
-    conn.commit()
-    print(f"Default admin user created: {admin_username}")
-else:
-    print("Admin user already exists")
-
-# Verify users table
-result = conn.execute("SELECT * FROM users").fetchall()
-print("Users table contains:")
-for row in result:
-    print(f"ID: {row[0]}, Username: {row[1]}, Email: {row[2]}")
-
-conn.close()
\ No newline at end of file
+from passwords import get_password_hash
+
+
+def init_db(conn):
+    """Create the schema and seed data. Safe to run against an existing database."""
+    # Create employees table
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY,
+            name VARCHAR,
+            age INTEGER,
+            email VARCHAR,
+            department VARCHAR
+        )
+    """)
+
+    # Create sequence for employee IDs, starting after any existing rows so
+    # databases created before the sequence keep working. The ALTER only runs
+    # while the column has no default yet and is checkpointed straight away:
+    # an ALTER left in the WAL by a killed process makes the file unopenable
+    # on DuckDB 1.5 ("Failure while replaying WAL file").
+    id_default = conn.execute("""
+        SELECT column_default FROM information_schema.columns
+        WHERE table_name = 'employees' AND column_name = 'id'
+    """).fetchone()[0]
+    if id_default is None:
+        next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM employees").fetchone()[0]
+        conn.execute(f"CREATE SEQUENCE IF NOT EXISTS employee_id_seq START {next_id};")
+        conn.execute("ALTER TABLE employees ALTER COLUMN id SET DEFAULT nextval('employee_id_seq');")
+        conn.execute("CHECKPOINT;")
+
+    if conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0] == 0:
+        sample = [
+            ("Paul Smith",     32, "paul@example.com",     "Engineering"),
+            ("Lisa Wong",      28, "lisa@example.com",      "Design"),
+            ("Tom Chen",       45, "tom@example.com",       "Management"),
+            ("Anna Lee",       29, "anna@example.com",      "Marketing"),
+            ("David Kim",      38, "david@example.com",     "Sales")
+        ]
+        conn.executemany("INSERT INTO employees (name, age, email, department) VALUES (?,?,?,?)", sample)
+        conn.commit()
+        print("Sample data inserted")
+
+    # Create sequence for user IDs
+    conn.execute("CREATE SEQUENCE IF NOT EXISTS user_id_seq START 1;")
+
+    # Create users table using the sequence for the default value
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY DEFAULT nextval('user_id_seq'),
+            username VARCHAR UNIQUE NOT NULL,
+            email VARCHAR UNIQUE NOT NULL,
+            hashed_password VARCHAR NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create sessions table, see create_session
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash BLOB PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            expires_at TIMESTAMP NOT NULL
+        )
+    """)
+
+    # Check if admin user exists, if not create one
+    if conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0:
+        # Create default admin user
+        admin_username = "admin"
+        admin_email = "admin@example.com"
+        admin_password = "admin123"  # Change this in production
+
+        hashed_password = get_password_hash(admin_password)
+        conn.execute(
+            "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
+            [admin_username, admin_email, hashed_password]
+        )
+        conn.commit()
+        print(f"Default admin user created: {admin_username}")
+
+
+if __name__ == "__main__":
+    # Run once before starting the app, e.g. as a deployment pre-start hook
+    conn = duckdb.connect(os.getenv('DB_PATH', 'sample.db'), config={'allow_unsigned_extensions': True})
+    init_db(conn)
+
+    # Verify users table
+    result = conn.execute("SELECT * FROM users").fetchall()
+    print("Users table contains:")
+    for row in result:
+        print(f"ID: {row[0]}, Username: {row[1]}, Email: {row[2]}")
+
+    conn.close()
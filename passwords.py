@@ -0,0 +1,21 @@
+from passlib.context import CryptContext
+
+# Password hashing context. New hashes use argon2id; pbkdf2_sha256 is kept
+# only to verify older hashes, which are upgraded on the next good login.
+# 19 MiB per hash keeps concurrent logins well inside the container's memory.
+pwd_context = CryptContext(
+    schemes=["argon2", "pbkdf2_sha256"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1,
+)
+
+
+def verify_password(plain_password: str, hashed_password: str):
+    """Return (valid, new_hash); new_hash is set when the stored hash is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return pwd_context.hash(password)